@@ -1,13 +1,95 @@
+import argparse
+import json
 import sys
 
+from asmfmt import file_edits, FormatErrorException
+from asmfmt.edits import unified_diff
+from asmfmt.parallel import format_text_parallel, PARALLEL_MIN_LINES
 from asmfmt.parser import Parser
-from asmfmt.writer import Writer
+from asmfmt.watch import Watcher
 
 
 def main(args):
-    file = args[0]
+    argparser = argparse.ArgumentParser(prog="asmfmt")
+    argparser.add_argument("file", nargs="?")
+    argparser.add_argument("--watch", nargs="+", metavar="DIR",
+                           help="reformat files under DIR as they change")
+    argparser.add_argument("--check", action="store_true",
+                           help="with --watch, only report unformatted files")
+    argparser.add_argument("--verify", action="store_true",
+                           help="only check that the formatted file parses to "
+                                "the same program, exit with 1 if it doesn't")
+    argparser.add_argument("--edits", action="store_true",
+                           help="print the edits that format the file as JSON")
+    argparser.add_argument("--diff", action="store_true",
+                           help="print the edits that format the file as a "
+                                "unified diff")
+    argparser.add_argument("--jobs", type=int, metavar="N",
+                           help="processes used to format files of at least "
+                                f"{PARALLEL_MIN_LINES} lines with --watch or "
+                                "--verify (default: one per CPU)")
+    argparser.add_argument("--data-values-per-line", type=int, metavar="N",
+                           help="with --watch or --verify, wrap data "
+                                "definitions to at most N values per line")
+    args = argparser.parse_args(args)
 
-    with open(file) as f:
+    if args.jobs is not None and args.jobs < 1:
+        argparser.error("--jobs must be at least 1")
+
+    if args.data_values_per_line is not None and args.data_values_per_line < 1:
+        argparser.error("--data-values-per-line must be at least 1")
+
+    if args.data_values_per_line and (args.edits or args.diff):
+        argparser.error("--data-values-per-line can't be combined with --edits or --diff")
+
+    if args.check and not args.watch:
+        argparser.error("--check only works with --watch")
+
+    if args.edits and args.diff:
+        argparser.error("--edits and --diff can't be combined")
+
+    if args.verify and (args.edits or args.diff):
+        argparser.error("--verify can't be combined with --edits or --diff")
+
+    if args.watch:
+        try:
+            Watcher(args.watch, check=args.check, verify=args.verify,
+                    jobs=args.jobs,
+                    data_values_per_line=args.data_values_per_line).run()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if not args.file:
+        argparser.error("a file or --watch is required")
+
+    if args.edits or args.diff:
+        try:
+            edits = file_edits(args.file)
+        except FormatErrorException as e:
+            sys.stderr.write(f"{args.file}: {e}\n")
+            sys.exit(1)
+
+        if args.edits:
+            json.dump([e.to_json() for e in edits], sys.stdout)
+            sys.stdout.write('\n')
+        else:
+            sys.stdout.write(unified_diff(edits, args.file))
+        return
+
+    if args.verify:
+        with open(args.file) as f:
+            text = f.read()
+
+        try:
+            format_text_parallel(text, verify=True, jobs=args.jobs,
+                                 data_values_per_line=args.data_values_per_line)
+        except FormatErrorException as e:
+            sys.stderr.write(f"{args.file}: {e}\n")
+            sys.exit(1)
+        return
+
+    with open(args.file) as f:
         p = Parser(f)
         lines = p.parse()
 
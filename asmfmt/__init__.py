@@ -0,0 +1,82 @@
+import io
+
+from .parser import Parser
+from .writer import Writer, wrap_data_lines
+from .cache import LineCache
+from .fingerprint import fingerprint_items, fingerprint_text, first_difference
+
+
+class FormatErrorException(Exception):
+    pass
+
+class VerificationErrorException(FormatErrorException):
+    def __init__(self, line: int):
+        super().__init__(f"Formatted output differs from the input at line {line}")
+        self.line = line
+
+
+def render(render_lines):
+    """
+    Calls render_lines, a Writer method, turning items that can't be
+    formatted into a FormatErrorException
+    """
+    try:
+        return render_lines()
+    except NotImplementedError:
+        raise FormatErrorException("the input contains an item that can't be formatted")
+
+
+def format_text(text: str, line_cache=None, verify=False, data_values_per_line=None) -> str:
+    """
+    Parses and formats a whole source text, raises FormatErrorException if the
+    text couldn't be parsed. A LineCache can be passed in to reuse the parse
+    of repeated lines, also across calls.
+
+    With verify the output is checked to have the same line fingerprints as
+    the input, a VerificationErrorException points to the first line that
+    differs. Data definitions longer than data_values_per_line values are
+    wrapped, verify then compares with the wrapped lines and the line number
+    is the one in the output
+    """
+    # The output is parsed again with the items of the input lines cached,
+    # so lines the Writer left as they were aren't parsed twice
+    if verify and line_cache is None:
+        line_cache = LineCache(max_size=text.count('\n') + 1)
+
+    lines = Parser(io.StringIO(text), line_cache=line_cache).parse()
+
+    # Parser.parse stops at the first error and appends its message
+    if lines and isinstance(lines[-1], str):
+        raise FormatErrorException(lines[-1].splitlines()[0])
+
+    if data_values_per_line:
+        lines = wrap_data_lines(lines, data_values_per_line)
+
+    # Taken before the Writer expands the structs
+    fingerprint = fingerprint_items(lines) if verify else None
+
+    formatted = render(Writer(lines).format)
+
+    if verify:
+        line = first_difference(fingerprint, fingerprint_text(formatted, line_cache))
+        if line is not None:
+            raise VerificationErrorException(line)
+
+    return formatted
+
+
+def file_edits(path: str, line_cache=None):
+    """
+    Returns the list of TextEdits that format a file, empty if it's already
+    formatted. The source is streamed from the file again to compare it with
+    the formatted lines instead of being kept in memory
+    """
+    with open(path) as f:
+        lines = Parser(f, line_cache=line_cache).parse()
+
+    if lines and isinstance(lines[-1], str):
+        raise FormatErrorException(lines[-1].splitlines()[0])
+
+    # Keep \r\n line endings so they show up as edits
+    with open(path, newline='') as f:
+        return render(lambda: Writer(lines).edits(f))
@@ -0,0 +1,133 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from . import format_text, FormatErrorException
+
+
+_executor = None
+
+def get_executor():
+    """
+    Returns the process pool shared by every call that doesn't pass its own
+    executor, it is created on first use and reused after that
+    """
+    global _executor
+
+    if _executor is None:
+        _executor = ProcessPoolExecutor()
+
+    return _executor
+
+
+class FormatResult:
+    def __init__(self, path, formatted=None, changed=False, error=None):
+        self.path = path
+        self.formatted = formatted
+        self.changed = changed
+        self.error = error
+
+    def __str__(self):
+        if self.error is not None:
+            return f"FormatResult({self.path}, error={self.error})"
+
+        return f"FormatResult({self.path}, changed={self.changed})"
+
+
+def read_file(path):
+    with open(path) as f:
+        return f.read()
+
+def write_file(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+async def _read_and_format(path, executor, timeout, verify):
+    loop = asyncio.get_running_loop()
+
+    text = await asyncio.to_thread(read_file, path)
+
+    fut = loop.run_in_executor(executor or get_executor(), format_text, text, None, verify)
+    formatted = await asyncio.wait_for(fut, timeout)
+
+    return text, formatted
+
+
+async def format_file(path, executor=None, timeout=None, write=False, verify=False) -> str:
+    """
+    Formats a file without blocking the event loop: the file is read and
+    written in a thread and the parsing and rendering runs in executor, the
+    shared process pool by default. Returns the formatted text, with write it
+    is also written back if it changed.
+
+    timeout (in seconds) only covers the formatting, a process that already
+    started on the file keeps running until it's done but its result is
+    dropped
+    """
+    text, formatted = await _read_and_format(path, executor, timeout, verify)
+
+    if write and formatted != text:
+        await asyncio.to_thread(write_file, path, formatted)
+
+    return formatted
+
+
+async def format_file_result(path, executor=None, timeout=None, write=False, verify=False):
+    """
+    Same as format_file but returns a FormatResult that holds the error
+    instead of raising it, only cancellation is passed on
+    """
+    global _executor
+
+    try:
+        text, formatted = await _read_and_format(path, executor, timeout, verify)
+
+        changed = formatted != text
+        if write and changed:
+            await asyncio.to_thread(write_file, path, formatted)
+    # wait_for raises asyncio.TimeoutError, before Python 3.11 it isn't the
+    # builtin TimeoutError. That one is an OSError, it has to come first
+    except asyncio.TimeoutError:
+        return FormatResult(path, error=f"timed out after {timeout}s")
+    except (OSError, UnicodeDecodeError, FormatErrorException) as e:
+        return FormatResult(path, error=str(e))
+    except Exception as e:
+        # A worker that died breaks the whole pool, start a new shared one
+        # for the files that come after this one
+        if isinstance(e, BrokenProcessPool) and executor is None:
+            _executor = None
+
+        return FormatResult(path, error=f"{type(e).__name__}: {e}")
+
+    return FormatResult(path, formatted, changed)
+
+
+async def format_files(paths, concurrency=4, executor=None, timeout=None,
+                       write=False, verify=False):
+    """
+    Formats many files with at most `concurrency` of them in flight and
+    yields a FormatResult for each as they finish. paths can be a lazy
+    iterable, the next file is only started once a slot is free and the
+    caller took the previous result, so a slow consumer holds the work back.
+    Closing or cancelling the iteration cancels the files still in flight.
+    """
+    pending = set()
+
+    try:
+        for path in paths:
+            pending.add(asyncio.create_task(
+                format_file_result(path, executor, timeout, write, verify)))
+
+            if len(pending) >= concurrency:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
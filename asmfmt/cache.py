@@ -0,0 +1,38 @@
+from collections import OrderedDict
+
+
+class LineCache:
+    """
+    Size bounded LRU cache that maps the raw text of a source line to the item
+    it was parsed into. The format of a line doesn't depend on its neighbours
+    (only the comment column does, and Writer handles that) so repeated lines
+    can skip tokenizing and parsing entirely.
+
+    Cached items are shared between every line with the same text and must
+    not be modified.
+    """
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, text):
+        item = self.entries.get(text)
+        if item is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(text)
+        self.hits += 1
+        return item
+
+    def put(self, text, item):
+        self.entries[text] = item
+        self.entries.move_to_end(text)
+
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
@@ -0,0 +1,71 @@
+import io
+
+
+class TextEdit:
+    """
+    Replaces the source lines [start, end) (0-based) with new_lines, the
+    replaced lines are kept too so the edit can be shown as a diff. Lines
+    end at \n, \r\n or a lone \r like LSP positions count them
+    """
+    def __init__(self, start: int, end: int, old_lines: [str], new_lines: [str]):
+        self.start = start
+        self.end = end
+        self.old_lines = old_lines
+        self.new_lines = new_lines
+
+    def __str__(self):
+        return f"TextEdit({self.start}, {self.end}, {len(self.new_lines)} lines)"
+
+    def to_json(self):
+        """
+        Returns the edit in the shape of an LSP TextEdit
+        """
+        return {
+            "range": {
+                "start": {"line": self.start, "character": 0},
+                "end": {"line": self.end, "character": 0},
+            },
+            "newText": "".join(self.new_lines),
+        }
+
+
+def unified_diff(edits: [TextEdit], path: str) -> str:
+    """
+    Renders the edits as a unified diff without context lines, it applies
+    with `git apply --unidiff-zero` or `patch`. Those only split lines at
+    \n, the replaced lines are split the same way, Writer.edits keeps the
+    lines that share a \n line in one edit
+    """
+    if not edits:
+        return ""
+
+    out = [f"--- a/{path}\n", f"+++ b/{path}\n"]
+
+    # Line numbers in the new file move by the size of every earlier edit
+    offset = 0
+    # Lone \r line ends in earlier edits, they don't start a new line here
+    lone_cr = 0
+    for e in edits:
+        old_lines = io.StringIO("".join(e.old_lines)).readlines()
+        start = e.start - lone_cr
+        lone_cr += len(e.old_lines) - len(old_lines)
+
+        old_count = len(old_lines)
+        new_count = len(e.new_lines)
+
+        # An empty range starts at the line before it
+        old_start = start + 1 if old_count else start
+        new_start = start + offset + 1 if new_count else start + offset
+
+        out.append(f"@@ -{old_start},{old_count} +{new_start},{new_count} @@\n")
+        for l in old_lines:
+            out.append("-" + l)
+        # Only the last line of the file can be missing its \n
+        if old_lines and not old_lines[-1].endswith('\n'):
+            out.append("\n\\ No newline at end of file\n")
+        for l in e.new_lines:
+            out.append("+" + l)
+
+        offset += new_count - old_count
+
+    return "".join(out)
@@ -0,0 +1,79 @@
+import io
+
+from .items import StructDefinition, StructInstantiation
+from .parser import Parser
+
+
+class Fingerprint:
+    """
+    Structural hash of every line of a source, computed from the items the
+    Parser returned so whitespace and where a comment starts don't change
+    it. Two sources with the same fingerprints parse to the same program.
+
+    Items are hashed through their __str__ dump, which shows the whole
+    parsed tree. Lines from the line cache share their item, those are only
+    hashed once.
+    """
+    def __init__(self):
+        self.lines = []
+        # item -> hash, items hash by identity and are kept alive by this
+        self.seen = {}
+
+    def add(self, item):
+        if isinstance(item, (StructDefinition, StructInstantiation)):
+            self.lines.extend(hash(l) for l in item_lines(item))
+            return
+
+        h = self.seen.get(item)
+        if h is None:
+            h = self.seen[item] = hash(str(item))
+
+        self.lines.append(h)
+
+
+def item_lines(item) -> [str]:
+    """
+    Returns the dump of every source line of a parsed item, structs span
+    several lines. A parse error, the message Parser.parse appends, is its
+    own line
+    """
+    if isinstance(item, StructDefinition):
+        return [f"struc {item.name}"] + [str(f) for f in item.fields] + ["endstruc"]
+
+    if isinstance(item, StructInstantiation):
+        return [f"istruc {item.name}"] \
+            + [f"at {field}, {ins}" for field, ins in item.fields] \
+            + ["iend"]
+
+    return [str(item)]
+
+
+def fingerprint_items(items) -> Fingerprint:
+    fp = Fingerprint()
+    for item in items:
+        fp.add(item)
+
+    return fp
+
+
+def fingerprint_text(text: str, line_cache=None) -> Fingerprint:
+    """
+    Parses a source and fingerprints it, like any parse repeated lines are
+    taken from line_cache
+    """
+    return fingerprint_items(Parser(io.StringIO(text), line_cache=line_cache).parse())
+
+
+def first_difference(a: Fingerprint, b: Fingerprint):
+    """
+    Returns the 1-based number of the first line where the fingerprints
+    differ, or None if they are the same
+    """
+    for i, (x, y) in enumerate(zip(a.lines, b.lines)):
+        if x != y:
+            return i + 1
+
+    if len(a.lines) != len(b.lines):
+        return min(len(a.lines), len(b.lines)) + 1
+
+    return None
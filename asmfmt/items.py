@@ -1,3 +1,22 @@
+import re
+
+from .token import TokenType
+
+
+# How the binary and unary operators are written back
+OPERATORS = {
+    TokenType.BITWISE_OR: "|",
+    TokenType.FORWARD_SLASH: "/",
+    TokenType.MINUS: "-",
+    TokenType.PLUS: "+",
+    TokenType.SHIFT_LEFT: "<<",
+}
+
+
+# The commas between data literals with any whitespace around them
+_DATA_SEPARATOR_RE = re.compile(r"[ \t\r]*,[ \t\r]*")
+
+
 class Directive:
     def __init__(self, directive, arg):
         self.directive = directive
@@ -58,6 +77,9 @@ class Instruction:
 
         return f"{prefix}{self.instruction}"
 
+    def format_operands(self):
+        return ", ".join(op.format() for op in self.operands)
+
 
 class Comment:
     def __init__(self, comment):
@@ -96,7 +118,28 @@ class NumberExpression(Expression):
     def format(self):
         return self.number
 
-class EffectiveAddressExpression:
+class DataLiterals(Expression):
+    """
+    A run of simple literal operands of a data definition (`db 1, 2, 3`),
+    kept as the source text of the run instead of one NumberExpression per
+    value. The values are only split out when they are needed one by one
+    """
+    def __init__(self, text):
+        self.text = text
+
+    def __len__(self):
+        return self.text.count(',') + 1
+
+    def values(self):
+        return [v.strip() for v in self.text.split(',')]
+
+    def __str__(self):
+        return f"DataLiterals({self.values()})"
+
+    def format(self):
+        return _DATA_SEPARATOR_RE.sub(", ", self.text)
+
+class EffectiveAddressExpression(Expression):
     def __init__(self, _type, expr):
         self._type = _type
         self.expr = expr
@@ -104,6 +147,12 @@ class EffectiveAddressExpression:
     def __str__(self):
         return f"EffectiveAddressExpression({self._type}, {self.expr})"
 
+    def format(self):
+        if self._type:
+            return f"{self._type} [{self.expr.format()}]"
+
+        return f"[{self.expr.format()}]"
+
 class CharLiteralExpression(Expression):
     def __init__(self, char):
         self.char = char
@@ -111,6 +160,9 @@ class CharLiteralExpression(Expression):
     def __str__(self):
         return f"CharLiteralExpression({repr(self.char)})"
 
+    def format(self):
+        return f"'{self.char}'"
+
 class StringLiteralExpression(Expression):
     def __init__(self, string):
         self.string = string
@@ -118,16 +170,35 @@ class StringLiteralExpression(Expression):
     def __str__(self):
         return f"StringLiteralExpression({repr(self.string)})"
 
-class BinaryExpression:
-    def __init__(self, op, lhs, rhs):
-        self.op = op
-        self.lhs = lhs
-        self.rhs = rhs
+    def format(self):
+        return f'"{self.string}"'
+
+class BinaryExpression(Expression):
+    """
+    A chain of binary operators, `a - b + c` has the operands [a, b, c] and
+    the operators [-, +]. The operators are right associative, the chain is
+    kept flat so long lines don't nest thousands of levels deep
+    """
+    def __init__(self, ops, operands):
+        self.ops = ops
+        self.operands = operands
 
     def __str__(self):
-        return f"BinaryExpression({self.op}, {self.lhs}, {self.rhs})"
+        # Same as the right nested form, a - (b + c)
+        s = ""
+        for op, operand in zip(self.ops, self.operands):
+            s += f"BinaryExpression({op}, {operand}, "
+
+        return s + str(self.operands[-1]) + ")" * len(self.ops)
+
+    def format(self):
+        formatted = self.operands[0].format()
+        for op, operand in zip(self.ops, self.operands[1:]):
+            formatted += f" {OPERATORS[op._type]} {operand.format()}"
+
+        return formatted
     
-class UnaryExpression:
+class UnaryExpression(Expression):
     def __init__(self, op, expr):
         self.op = op
         self.expr = expr
@@ -135,13 +206,19 @@ class UnaryExpression:
     def __str__(self):
         return f"UnaryExpression({self.op}, {self.expr})"
 
-class ParenExpression:
+    def format(self):
+        return f"{OPERATORS[self.op]}{self.expr.format()}"
+
+class ParenExpression(Expression):
     def __init__(self, expr):
         self.expr = expr
 
     def __str__(self):
         return f"ParenExpression({self.expr})"
 
+    def format(self):
+        return f"({self.expr.format()})"
+
 class CodeLine:
     def __init__(self, label, instruction, comment):
         self.label = label
@@ -188,15 +265,26 @@ class CodeLine:
             else:
                 formatted += "  "
 
-            for i, op in enumerate(self.instruction.operands):
-                formatted += op.format()
-
-                if i + 1 < len(self.instruction.operands):
-                    formatted += ", "
+            formatted += self.instruction.format_operands()
 
         return formatted
 
 
+class TextLine:
+    """
+    A line that is already formatted, like the `struc` and `endstruc` lines
+    around the fields of a struct
+    """
+    def __init__(self, text):
+        self.text = text
+
+    def __str__(self):
+        return f"TextLine({self.text})"
+
+    def format(self):
+        return self.text
+
+
 class DirectiveLine:
     def __init__(self, directive):
         self.directive = directive
@@ -211,6 +299,9 @@ class MacroDefineLine:
 
     def __str__(self):
         return f"MacroDefine({self.name}, {self.value})"
+
+    def format(self):
+        return f"%define {self.name} {self.value.format()}"
         
 class AssignMacro:
     def __init__(self, name, expr):
@@ -220,6 +311,9 @@ class AssignMacro:
     def __str__(self):
         return f"AssignMacro({self.name}, {self.expr})"
 
+    def format(self):
+        return f"%assign {self.name} {self.expr.format()}"
+
 class WarningMacro:
     def __init__(self, message):
         self.message = message
@@ -227,6 +321,9 @@ class WarningMacro:
     def __str__(self):
         return f"WarningMacro({self.message})"
 
+    def format(self):
+        return f"%warning {self.message}"
+
 
 class StructDefinition:
     def __init__(self, name: str, fields: [CodeLine]):
@@ -240,6 +337,16 @@ class StructDefinition:
             + fields \
             + "\n)"
 
+    def lines(self):
+        """
+        Returns the struct as one item per source line, Writer formats those
+        so the comments of the fields line up with the rest of the file
+        """
+        return [TextLine(f"struc {self.name}")] + self.fields + [TextLine("endstruc")]
+
+    def format(self):
+        return "\n".join(l.format() for l in self.lines())
+
 class StructInstantiation:
     def __init__(self, name: str, fields: [(str, Instruction)]):
         self.name = name
@@ -251,3 +358,21 @@ class StructInstantiation:
         return f"IStruct({self.name},\n" \
             + fields \
             + "\n)"
+
+    def lines(self):
+        """
+        Returns the instantiation as one item per source line, like
+        StructDefinition.lines
+        """
+        lines = [TextLine(f"istruc {self.name}")]
+        for field, ins in self.fields:
+            text = f"at {field}, {ins.format()}"
+            if ins.operands:
+                text += " " + ins.format_operands()
+            lines.append(TextLine(" " * 8 + text))
+        lines.append(TextLine("iend"))
+
+        return lines
+
+    def format(self):
+        return "\n".join(l.format() for l in self.lines())
@@ -0,0 +1,140 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from . import format_text
+from .fingerprint import fingerprint_items, fingerprint_text, first_difference
+from .items import CodeLine
+from .parser import Parser
+from .writer import Writer, wrap_data_lines
+
+
+# Below this many lines starting the process pool costs more than the
+# parsing it spreads out, about 30k lines break even on a single core
+PARALLEL_MIN_LINES = 50_000
+
+# Blocks that span several lines and must be parsed as a whole
+BLOCK_ENDS = {
+    "struc": "endstruc",
+    "istruc": "iend",
+}
+
+
+def split_chunks(text: str, chunk_lines: int) -> [str]:
+    """
+    Splits text into chunks of roughly chunk_lines lines, chunks only end at
+    a line boundary outside of struc/istruc blocks so every chunk can be
+    parsed on its own
+    """
+    chunks = []
+    # Split like the parser's io.StringIO does, only at '\n', splitlines
+    # would also end lines at \r, \x0c, \x85, \u2028 and the like
+    lines = io.StringIO(text).readlines()
+
+    start = 0
+    block_end = None
+    for i, line in enumerate(lines):
+        words = line.split(None, 1)
+        first = words[0] if words else ""
+
+        if block_end is None:
+            block_end = BLOCK_ENDS.get(first)
+        elif first == block_end:
+            block_end = None
+
+        if block_end is None and i + 1 - start >= chunk_lines:
+            chunks.append("".join(lines[start:i + 1]))
+            start = i + 1
+
+    if start < len(lines):
+        chunks.append("".join(lines[start:]))
+
+    return chunks
+
+
+def format_chunk(text: str, verify=False, data_values_per_line=None):
+    """
+    Parses and pre-renders a chunk without its comments, returns the
+    formatted lines, the (index, comment) pairs that still have to be added
+    and the longest line, or None if the chunk can't be parsed or formatted.
+
+    With verify the chunk is checked like format_text does, the comment
+    column only changes whitespace so it doesn't matter for the check
+    """
+    lines = Parser(io.StringIO(text)).parse()
+    if lines and isinstance(lines[-1], str):
+        return None
+
+    if data_values_per_line:
+        lines = wrap_data_lines(lines, data_values_per_line)
+
+    fingerprint = fingerprint_items(lines) if verify else None
+
+    w = Writer(lines)
+    try:
+        w.format_lines()
+    except NotImplementedError:
+        return None
+
+    # Writer expands structs into their lines
+    comments = []
+    for i, l in enumerate(w.lines):
+        if isinstance(l, CodeLine) and l.comment:
+            comments.append((i, l.comment.format()))
+
+    if verify:
+        rendered = list(w.formatted_lines)
+        for i, comment in comments:
+            rendered[i] += " " + comment
+
+        rendered = "".join(l + '\n' for l in rendered)
+        if first_difference(fingerprint, fingerprint_text(rendered)) is not None:
+            return None
+
+    return w.formatted_lines, comments, w.longest_line_length
+
+
+def format_text_parallel(text: str, line_cache=None, verify=False,
+                         data_values_per_line=None, jobs=None, chunk_lines=None) -> str:
+    """
+    Same as format_text but splits big inputs into chunks that are parsed and
+    rendered in a process pool, the comments are added once every chunk is
+    done since their column depends on the whole file.
+
+    By default a text is split into one chunk per job once it has at least
+    PARALLEL_MIN_LINES lines, smaller ones and a single job go through
+    format_text with line_cache. Passing chunk_lines always splits.
+    """
+    jobs = jobs or os.cpu_count()
+
+    if chunk_lines is None:
+        lines = text.count('\n') + 1
+        if jobs < 2 or lines < PARALLEL_MIN_LINES:
+            return format_text(text, line_cache, verify, data_values_per_line)
+
+        chunk_lines = -(-lines // jobs)
+
+    chunks = split_chunks(text, chunk_lines)
+    if len(chunks) < 2:
+        return format_text(text, line_cache, verify, data_values_per_line)
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(format_chunk, chunks, [verify] * len(chunks),
+                                [data_values_per_line] * len(chunks)))
+
+    # Let the serial path report the error
+    if None in results:
+        return format_text(text, line_cache, verify, data_values_per_line)
+
+    longest = max(r[2] for r in results)
+    comment_col = longest + 2
+
+    out = []
+    for formatted_lines, comments, _ in results:
+        for i, comment in comments:
+            l = formatted_lines[i]
+            formatted_lines[i] = l + ' ' * (comment_col - len(l)) + comment
+
+        out.extend(formatted_lines)
+
+    return "".join(l + '\n' for l in out)
@@ -1,3 +1,4 @@
+import re
 import traceback
 
 from .token import Tokenizer, TokenType, Token, UnexpectedCharException
@@ -8,11 +9,44 @@ class SyntaxErrorException(Exception):
     def __init__(self, expected: TokenType, got: Token):
         super().__init__(f"Expected {expected}, got {got} at {got.location}")
 
+class NestingTooDeepException(Exception):
+    def __init__(self, got: Token):
+        super().__init__(f"Expression nested too deeply at {got.location}")
+
+# Limit for nested parens, brackets and unary minus, parse_expression recurses
+# for each level so this keeps malicious input away from the recursion limit
+MAX_EXPRESSION_DEPTH = 100
+
+# Data definitions whose operands are usually long runs of numbers
+DATA_DEFINITIONS = ["DB", "DW", "DD", "DQ", "DT", "DO", "DY", "DZ"]
+
+SIZE_SPECIFIERS = ["byte", "word", "dword", "qword"]
+
+# Pieces of the simple line shapes handled by Parser.parse_simple_line, they
+# match the same text as the Tokenizer would for these tokens
+_WS = r"[ \t\r\f\v]*"
+_IDENT = r"[A-Za-z_.][A-Za-z0-9_.]*"
+_NUMBER = r"(?=\$0|[0-9])(?:\$0)?(?:0[dxhoqby])?[0-9A-Fa-f_]*[dhqoby]?"
+
+_SIMPLE_WORD_RE = re.compile(_WS + r"(?:(" + _IDENT + r")" + _WS + r")?")
+_SIMPLE_OPERAND_RE = re.compile(
+    _WS + r"(?:(?P<ident>" + _IDENT + r")|(?P<number>" + _NUMBER + r")"
+    + r"|\[" + _WS + r"(?P<base>" + _IDENT + r")" + _WS
+    + r"(?:(?P<op>[+-])" + _WS
+    + r"(?:(?P<index>" + _IDENT + r")|(?P<disp>" + _NUMBER + r"))" + _WS + r")?\])"
+    + _WS)
+
+
 class Parser:
-    def __init__(self, input_file):
-        self.tokenizer = Tokenizer(input_file)
-        self.cur_token = self.tokenizer.next_token()
+    def __init__(self, input_file, names=None, line_cache=None):
+        self.tokenizer = Tokenizer(input_file, names)
         self.parsed_lines = []
+        self.expression_depth = 0
+        self.line_cache = line_cache
+
+        # parse_next_line expects to start on the newline that ended the
+        # previous line, pretend there is one before the first line
+        self.cur_token = self.tokenizer.make_token(TokenType.NEWLINE)
 
     def eat(self):
         self.cur_token = self.tokenizer.next_token()
@@ -31,13 +65,40 @@ class Parser:
         return value
 
     def parse_expression(self):
+        self.expression_depth += 1
+        if self.expression_depth > MAX_EXPRESSION_DEPTH:
+            raise NestingTooDeepException(self.cur_token)
+
+        try:
+            # Binary operators are right associative, `a - b - c` is
+            # a - (b - c). The chain is collected in a loop and kept flat so
+            # long lines don't recurse
+            operands = [self.parse_operand()]
+            ops = []
+            while self.cur_token._type in [TokenType.MINUS,
+                                           TokenType.PLUS,
+                                           TokenType.FORWARD_SLASH,
+                                           TokenType.SHIFT_LEFT,
+                                           TokenType.BITWISE_OR]:
+                ops.append(self.cur_token)
+                self.eat()
+                operands.append(self.parse_operand())
+
+            if not ops:
+                return operands[0]
+
+            return BinaryExpression(ops, operands)
+        finally:
+            self.expression_depth -= 1
+
+    def parse_operand(self):
         lhs = None
 
         match self.cur_token._type:
             case TokenType.IDENT:
                 ident = self.cur_token.ident
 
-                if ident.lower() in ["byte", "word", "dword", "qword"]:
+                if ident.lower() in SIZE_SPECIFIERS:
                     self.eat()
                     self.expect(TokenType.OPEN_BRACKET)
                     addr = self.parse_effective_address()
@@ -77,16 +138,6 @@ class Parser:
             case _:
                 raise SyntaxErrorException("expression", self.cur_token)
 
-        if self.cur_token._type in [TokenType.MINUS,
-                                    TokenType.PLUS,
-                                    TokenType.FORWARD_SLASH,
-                                    TokenType.SHIFT_LEFT,
-                                    TokenType.BITWISE_OR]:
-            op = self.cur_token
-            self.eat()
-            rhs = self.parse_expression()
-            return BinaryExpression(op, lhs, rhs)
-
         return lhs
 
     def parse_prefix(self):
@@ -95,24 +146,45 @@ class Parser:
             arg = self.parse_expression()
             return NASMTimesPrefix(arg)
 
-        prefix = self.cur_token.ident
-        self.eat()
-        return InstructionPrefix(prefix)
+        # Several prefixes can be stacked, `lock rep movsb`
+        prefixes = []
+        while self.cur_token.is_type(TokenType.INSTRUCTION_PREFIX) \
+              and self.cur_token.ident.upper() != "TIMES":
+            prefixes.append(self.cur_token.ident)
+            self.eat()
+
+        return InstructionPrefix(" ".join(prefixes))
 
     def parse_instruction(self):
         prefix = None
         if self.cur_token.is_type(TokenType.INSTRUCTION_PREFIX):
             prefix = self.parse_prefix()
 
+        # Anything else, like the comment in `rep ; hi`, would be written
+        # back as the mnemonic
+        self.expect(TokenType.INSTRUCTION)
         ins = self.cur_token
         self.eat()
 
         # no operands
-        if self.cur_token.is_type(TokenType.NEWLINE) or self.cur_token.is_type(TokenType.COMMENT):
+        if self.cur_token._type in [TokenType.NEWLINE, TokenType.COMMENT, TokenType.EOF]:
             return Instruction(ins.ident, [], prefix)
 
         operands = []
-        operands.append(self.parse_expression())
+        literals = None
+
+        # Fast path for data tables, the number literals are scanned in bulk
+        # by the tokenizer instead of going through parse_expression
+        if self.cur_token.is_type(TokenType.NUMBER) \
+           and ins.ident.upper() in DATA_DEFINITIONS:
+            literals = self.tokenizer.scan_data_literals()
+
+        if literals is not None:
+            operands.append(DataLiterals(self.cur_token.ident + literals))
+            self.eat()
+        else:
+            operands.append(self.parse_expression())
+
         while self.cur_token.is_type(TokenType.COMMA):
             self.eat()
             operands.append(self.parse_expression())
@@ -161,14 +233,11 @@ class Parser:
 
                 # The tokenizer is at the whitespace after the `%warning`, skip
                 # any extra whitespace
-                while self.tokenizer.cur_char.isspace():
+                while self.tokenizer.cur_char in [' ', '\t']:
                     self.tokenizer.eat()
 
                 # Now read the rest of the line as the message
-                message = ""
-                while self.tokenizer.cur_char != '\n':
-                    message += self.tokenizer.cur_char
-                    self.tokenizer.eat()
+                message = self.tokenizer.eat_until('\n')
 
                 # Eat the `warning` token now and the Tokenizer's state shouldn't
                 # be messed up
@@ -178,11 +247,12 @@ class Parser:
                 raise SyntaxErrorException("macro", self.cur_token)
 
     def parse_code_line(self):
-        assert self.cur_token._type in [TokenType.IDENT, \
+        if self.cur_token._type not in [TokenType.IDENT, \
                                         TokenType.INSTRUCTION, \
                                         TokenType.INSTRUCTION_PREFIX, \
-                                        TokenType.COMMENT]
-        
+                                        TokenType.COMMENT]:
+            raise SyntaxErrorException("label or instruction", self.cur_token)
+
         label = None
         if self.cur_token.is_type(TokenType.IDENT):
             label = self.cur_token.ident
@@ -261,6 +331,14 @@ class Parser:
         
         fields = []
         while not endstruc(): 
+            if self.cur_token.is_type(TokenType.EOF):
+                raise SyntaxErrorException("endstruc", self.cur_token)
+
+            # NASM doesn't nest structs, parse_line would recurse into them
+            if self.cur_token.is_type(TokenType.IDENT) \
+               and self.cur_token.ident in ["struc", "istruc"]:
+                raise SyntaxErrorException("endstruc", self.cur_token)
+
             line = self.parse_line()
             fields.append(line)
 
@@ -268,10 +346,11 @@ class Parser:
 
         return StructDefinition(name, fields)
 
-    def parse_line(self):
+    def parse_line(self, eat_newline=True):
         # Empty line
         if self.cur_token.is_type(TokenType.NEWLINE):
-            self.eat()
+            if eat_newline:
+                self.eat()
             return CodeLine(None, None, None)
 
         line = None
@@ -292,18 +371,171 @@ class Parser:
             case _:
                 line = self.parse_code_line()
 
-        self.expect(TokenType.NEWLINE)
-        self.eat()
+        # The last line doesn't need a trailing newline
+        if not self.cur_token.is_type(TokenType.EOF):
+            self.expect(TokenType.NEWLINE)
+            if eat_newline:
+                self.eat()
 
         return line
 
+    def simple_operand_name(self, ident):
+        """
+        Returns the interned name if ident would be parsed as a plain name,
+        or None
+        """
+        ident, _type = self.tokenizer.lookup_ident(ident)
+        if _type != TokenType.IDENT or ident.lower() in SIZE_SPECIFIERS:
+            return None
+
+        return ident
+
+    def parse_simple_line(self, text):
+        """
+        Parses the common `label: mnemonic op, op ; comment` shapes straight
+        from the raw text of a line without tokenizing it. Operands can be
+        names, numbers and [base], [base + index] or [base +/- disp]
+        addresses. Returns None for anything else so the line goes through
+        the tokenizer and the parser, which also report any errors
+        """
+        lookup = self.tokenizer.lookup_ident
+
+        label = None
+        instruction = None
+        comment = None
+
+        m = _SIMPLE_WORD_RE.match(text)
+        pos = m.end()
+        word = m.group(1)
+
+        if word is not None:
+            word, _type = lookup(word)
+            if _type == TokenType.IDENT:
+                if word in ["struc", "istruc"]:
+                    return None
+
+                label = word
+                if text[pos] == ':':
+                    pos += 1
+
+                m = _SIMPLE_WORD_RE.match(text, pos)
+                pos = m.end()
+                word = m.group(1)
+                if word is not None:
+                    word, _type = lookup(word)
+
+        if word is not None:
+            if _type != TokenType.INSTRUCTION or word.upper() in DATA_DEFINITIONS:
+                return None
+
+            operands = []
+            more = text[pos] not in [';', '\n']
+            while more:
+                m = _SIMPLE_OPERAND_RE.match(text, pos)
+                if not m:
+                    return None
+
+                ident, number, base, op, index, disp = m.groups()
+                if ident is not None:
+                    ident = self.simple_operand_name(ident)
+                    if ident is None:
+                        return None
+                    operand = IdentExpression(ident)
+                elif number is not None:
+                    operand = NumberExpression(number)
+                else:
+                    base = self.simple_operand_name(base)
+                    if base is None:
+                        return None
+                    addr = IdentExpression(base)
+
+                    if op is not None:
+                        if index is not None:
+                            index = self.simple_operand_name(index)
+                            if index is None:
+                                return None
+                            rhs = IdentExpression(index)
+                        else:
+                            rhs = NumberExpression(disp)
+
+                        op = TokenType.PLUS if op == '+' else TokenType.MINUS
+                        addr = BinaryExpression([self.tokenizer.make_token(op)], [addr, rhs])
+
+                    operand = EffectiveAddressExpression(None, addr)
+
+                operands.append(operand)
+                pos = m.end()
+
+                # A comma needs another operand after it
+                more = text[pos] == ','
+                if more:
+                    pos += 1
+                elif text[pos] not in [';', '\n']:
+                    return None
+
+            instruction = Instruction(word, operands, None)
+
+        if text[pos] == ';':
+            pos += 1
+            while text[pos] == ' ':
+                pos += 1
+
+            comment = Comment(text[pos:-1])
+        elif pos != len(text) - 1:
+            return None
+
+        return CodeLine(label, instruction, comment)
+
+    def parse_next_line(self):
+        """
+        Parses the next line, returns None if there are no lines left. Whole
+        lines are first looked up in the line cache and tried as a simple
+        line, their raw text is only known before their first token is read
+        so this starts with cur_token on the newline that ended the previous
+        line and leaves it on the one that ends this line
+        """
+        tokenizer = self.tokenizer
+        text = tokenizer.line
+        whole_line = tokenizer.pos == 0 and text.endswith('\n')
+
+        if whole_line:
+            if self.line_cache is not None:
+                line = self.line_cache.get(text)
+                if line is not None:
+                    tokenizer.skip_line()
+                    return line
+
+            line = self.parse_simple_line(text)
+            if line is not None:
+                tokenizer.skip_line()
+                if self.line_cache is not None:
+                    self.line_cache.put(text, line)
+                return line
+
+        first_line = tokenizer.cur_line
+        self.eat()
+        if self.cur_token.is_type(TokenType.EOF):
+            return None
+
+        line = self.parse_line(eat_newline=False)
+
+        # Only cache lines that were parsed from their own text alone
+        if self.line_cache is not None and whole_line \
+           and self.cur_token.is_type(TokenType.NEWLINE) \
+           and tokenizer.cur_line == first_line + 1 and tokenizer.pos == 0:
+            self.line_cache.put(text, line)
+
+        return line
 
     def parse(self):
         lines = []
         while not self.cur_token.is_type(TokenType.EOF):
 
             try:
-                l = self.parse_line()
+                l = self.parse_next_line()
+                if l is None:
+                    break
+
                 lines.append(l)
             except SyntaxErrorException as e:
                 lines.append("ERROR: " + str(e) + "\n" + traceback.format_exc())
@@ -311,5 +543,8 @@ class Parser:
             except UnexpectedCharException as e:
                 lines.append("ERROR: " + str(e) + "\n" + traceback.format_exc())
                 return lines
+            except NestingTooDeepException as e:
+                lines.append("ERROR: " + str(e) + "\n" + traceback.format_exc())
+                return lines
 
         return lines
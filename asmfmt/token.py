@@ -1,6 +1,7 @@
 from enum import Enum
 import json
 import os
+import re
 
 class UnexpectedCharException(Exception):
     def __init__(self, unexpected_char: str, location: (int, int)):
@@ -49,26 +50,102 @@ class Token:
         return self._type == _type
 
 
-class Tokenizer:
-    def __init__(self, input_file):
-        self.input_file = input_file
-        self.cur_char = input_file.read(1)
-        self.peek_char = input_file.read(1)
-        self.cur_line = 1
-        self.cur_col = 0
+# A simple numeric literal as accepted by Tokenizer.tokenize_number, only
+# matched when it is followed by the end of an operand
+_DATA_LITERAL = r"(?=\$0|[0-9])(?:\$0)?(?:0[dxhoqby])?[0-9A-Fa-f_]*[dhqoby]?" \
+                r"(?=[ \t\r]*(?:[,;\n]|\Z))"
+
+# A run of `, <literal>` operands following an already tokenized literal
+_DATA_RUN_RE = re.compile(r"(?=[ \t\r]*(?:[,;\n]|\Z))"
+                          r"(?:[ \t\r]*,[ \t\r]*" + _DATA_LITERAL + ")*")
+
+
+_keywords = None
+_keyword_names = None
+
+def load_keywords():
+    """
+    Loads the instruction, prefix and directive sets from instructions.json,
+    they are only read once per process and shared by every Tokenizer
+    """
+    global _keywords
 
+    if _keywords is None:
         ins_path = os.path.dirname(os.path.abspath(__file__))
         ins_path = os.path.join(ins_path, "..", "instructions.json")
         with open(ins_path) as f:
             j = json.loads(f.read())
-            self.instruction_set = j["instructions"] + j["nasm_instructions"]
-            self.prefix_set = j["prefixes"] + j["nasm_prefixes"]
-            self.directive_set = j["directives"]
+
+        # A few entries are mixed case (VEXTRACTF32x8), identifiers are
+        # looked up by their upper case spelling
+        def upper(*keys):
+            return {name.upper() for k in keys for name in j[k]}
+
+        _keywords = (upper("instructions", "nasm_instructions"),
+                     upper("prefixes", "nasm_prefixes"),
+                     upper("directives"),
+                     upper("registers", "sizes"))
+
+    return _keywords
+
+
+def keyword_names():
+    """
+    Returns the table used to seed a Tokenizer's intern table, it maps the
+    lower and upper case spelling of every keyword and register to itself and
+    its token type
+    """
+    global _keyword_names
+
+    if _keyword_names is None:
+        instructions, prefixes, directives, registers = load_keywords()
+
+        _keyword_names = {}
+        for names, _type in [(registers, TokenType.IDENT),
+                             (directives, TokenType.DIRECTIVE),
+                             (prefixes, TokenType.INSTRUCTION_PREFIX),
+                             (instructions, TokenType.INSTRUCTION)]:
+            for name in names:
+                for n in [name.upper(), name.lower()]:
+                    _keyword_names[n] = (n, _type)
+
+    return _keyword_names
+
+
+class Tokenizer:
+    def __init__(self, input_file, names=None):
+        self.input_file = input_file
+        self.line = input_file.readline()
+        self.pos = 0
+        self.load_chars()
+        self.cur_line = 1
+        self.cur_col = 0
+
+        self.instruction_set, self.prefix_set, self.directive_set, _ = load_keywords()
+
+        # Intern table, maps every identifier seen so far to a single shared
+        # copy of its text and its token type. It can be shared between
+        # Tokenizers of the same session by passing it in
+        if names is None:
+            names = dict(keyword_names())
+        self.names = names
+
+    def load_chars(self):
+        """
+        Sets cur_char and peek_char from the current position in the line
+        buffer, peek_char doesn't look past the end of the line so it is NULL
+        when cur_char is the newline
+        """
+        line = self.line
+        pos = self.pos
+
+        self.cur_char = line[pos] if pos < len(line) else '\0'
+        self.peek_char = line[pos + 1] if pos + 1 < len(line) else '\0'
 
     def eat(self):
         """
         Replaces cur_char with peek_char and reads the next char into peek_char,
-        if EOF is reached then peek_char is set to NULL
+        if EOF is reached then cur_char is set to NULL
         """
         if self.cur_char == '\n':
             self.cur_line += 1
@@ -76,12 +153,65 @@ class Tokenizer:
         else:
             self.cur_col += 1
 
-        self.cur_char = self.peek_char
-        c = self.input_file.read(1)
-        if not c:
-            self.peek_char = '\0'
-        else:
-            self.peek_char = c
+        self.pos += 1
+        if self.pos >= len(self.line):
+            self.line = self.input_file.readline()
+            self.pos = 0
+
+        self.load_chars()
+
+    def skip_line(self):
+        """
+        Skips the rest of the current line including its newline without
+        tokenizing it
+        """
+        self.cur_line += 1
+        self.cur_col = 0
+
+        self.line = self.input_file.readline()
+        self.pos = 0
+        self.load_chars()
+
+    def eat_until(self, char):
+        """
+        Eats and returns everything up to the first `char` on the current
+        line, stops at the end of the line or input if there is none so it
+        never goes past the newline
+        """
+        line = self.line
+        start = self.pos
+
+        end = line.find(char, start)
+        if end == -1:
+            end = len(line)
+        if line.endswith('\n') and end == len(line):
+            end -= 1
+
+        self.pos = end
+        self.cur_col += end - start
+        self.load_chars()
+
+        return line[start:end]
+
+    def scan_data_literals(self):
+        """
+        Called right after a number token was returned, scans the run of
+        `, <number>` operands that follows it in one go without creating any
+        tokens. Returns the source text of the run, empty if the number is the
+        only operand, and leaves the tokenizer at the first char that isn't
+        part of it, or returns None if the number token is part of a bigger
+        expression
+        """
+        m = _DATA_RUN_RE.match(self.line, self.pos)
+        if not m:
+            return None
+
+        run = m.group(0)
+        self.pos = m.end()
+        self.cur_col += len(run)
+        self.load_chars()
+
+        return run
 
     def is_instruction(self, ident):
         return ident.upper() in self.instruction_set
@@ -92,6 +222,27 @@ class Tokenizer:
     def is_directive(self, ident):
         return ident.upper() in self.directive_set
 
+    def lookup_ident(self, ident):
+        """
+        Returns the interned copy of ident and its token type
+        """
+        name = self.names.get(ident)
+        if name is None:
+            name = (ident, self.classify_ident(ident))
+            self.names[ident] = name
+
+        return name
+
+    def classify_ident(self, ident):
+        if self.is_instruction(ident):
+            return TokenType.INSTRUCTION
+        elif self.is_instruction_prefix(ident):
+            return TokenType.INSTRUCTION_PREFIX
+        elif self.is_directive(ident):
+            return TokenType.DIRECTIVE
+
+        return TokenType.IDENT
+
     def current_location(self):
         return (self.cur_line, self.cur_col)
 
@@ -131,16 +282,16 @@ class Tokenizer:
         return char.isalnum() or char in ['_', '.']
 
     def next_token(self):
+        # skip whitespaces, newlines are tokens so stop at them
+        while self.cur_char != '\n' and self.cur_char.isspace():
+            self.eat()
+
         if self.cur_char == '\0':
             return self.make_token(TokenType.EOF)
         elif self.cur_char == '\n':
             self.eat()
             return self.make_token(TokenType.NEWLINE)
 
-        # skip whitespaces
-        while self.cur_char.isspace():
-            self.eat()
-
         # tokenize identifiers and instructions
         if self.is_ident_stater(self.cur_char):
             ident = ""
@@ -151,14 +302,8 @@ class Tokenizer:
                 ident += self.cur_char
                 self.eat()
 
-            if self.is_instruction(ident):
-                return self.make_token(TokenType.INSTRUCTION, ident)
-            elif self.is_instruction_prefix(ident):
-                return self.make_token(TokenType.INSTRUCTION_PREFIX, ident)
-            elif self.is_directive(ident):
-                return self.make_token(TokenType.DIRECTIVE, ident)
-
-            return self.make_token(TokenType.IDENT, ident)
+            ident, _type = self.lookup_ident(ident)
+            return self.make_token(_type, ident)
 
         # tokenize numbers
         if self.cur_char.isnumeric() or (self.cur_char == '$' and self.peek_char == '0'):
@@ -221,17 +366,15 @@ class Tokenizer:
         # TODO: Handle escaped quotes inside string
         if self.cur_char == '"':
             self.eat()
-            ident = ""
+            ident = self.eat_until('"')
 
-            while self.cur_char != '"':
-                ident += self.cur_char
-                self.eat()
+            if self.cur_char != '"':
+                raise UnexpectedCharException("end of line", (self.cur_line, self.cur_col))
 
             tok = self.make_token(TokenType.STRING_LITERAL, ident)
 
         # tokenize comments
         if self.cur_char == ';':
-            comment = ""
             self.eat()  # ;
 
             # Skip whitespaces between ; and start of comment
@@ -242,9 +385,7 @@ class Tokenizer:
             while self.cur_char == ' ':
                 self.eat()
 
-            while self.cur_char != '\n':
-                comment += self.cur_char
-                self.eat()
+            comment = self.eat_until('\n')
 
             tok = self.make_token(TokenType.COMMENT, comment)
             return tok
@@ -0,0 +1,174 @@
+import hashlib
+import io
+import os
+import sys
+import time
+
+from .parallel import format_text_parallel
+from .cache import LineCache
+
+
+SOURCE_EXTENSIONS = (".asm", ".nasm", ".inc")
+
+
+def content_hash(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def decode(data: bytes) -> str:
+    """
+    Decodes a file's content with universal newlines like open() in text
+    mode, so a CRLF file isn't written back with mixed line endings
+    """
+    return io.TextIOWrapper(io.BytesIO(data), encoding="utf-8").read()
+
+
+class Watcher:
+    """
+    Polls directory trees for changed source files and reformats (or checks)
+    them once they stop changing for `debounce` seconds.
+
+    Files are only stat'ed while idle, they are read when their mtime or size
+    changes and only formatted when their content hash changed too. The hash
+    of what the watcher wrote itself is remembered so its own output doesn't
+    trigger another round.
+    """
+    def __init__(self, dirs, check=False, verify=False, interval=0.5,
+                 debounce=0.2, extensions=SOURCE_EXTENSIONS, out=sys.stdout,
+                 jobs=None, data_values_per_line=None):
+        self.dirs = dirs
+        self.check = check
+        self.verify = verify
+        self.jobs = jobs
+        self.data_values_per_line = data_values_per_line
+        self.interval = interval
+        self.debounce = debounce
+        self.extensions = extensions
+        self.out = out
+
+        # path -> (mtime_ns, size) as of the last scan
+        self.stats = {}
+        # path -> content hash of the last version that was handled
+        self.hashes = {}
+        # path -> time the file was last seen changing
+        self.pending = {}
+        # Edits usually leave most lines untouched, keep them parsed
+        self.line_cache = LineCache()
+
+    def scan(self):
+        """
+        Returns (mtime_ns, size) for every source file under the watched dirs,
+        hidden directories like .git are skipped
+        """
+        stats = {}
+        stack = list(self.dirs)
+
+        while stack:
+            try:
+                it = os.scandir(stack.pop())
+            except OSError:
+                continue
+
+            with it:
+                for entry in it:
+                    if entry.name.startswith('.'):
+                        continue
+
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.name.endswith(self.extensions):
+                            st = entry.stat()
+                            stats[entry.path] = (st.st_mtime_ns, st.st_size)
+                    except OSError:
+                        continue
+
+        return stats
+
+    def poll(self):
+        """
+        Scans the dirs once and returns the files whose changes have settled
+        """
+        now = time.monotonic()
+        stats = self.scan()
+
+        for path, st in stats.items():
+            if self.stats.get(path) != st:
+                self.pending[path] = now
+
+        for path in list(self.pending):
+            if path not in stats:
+                del self.pending[path]
+                self.hashes.pop(path, None)
+
+        self.stats = stats
+
+        ready = [p for p, t in self.pending.items() if now - t >= self.debounce]
+        for path in ready:
+            del self.pending[path]
+
+        return sorted(ready)
+
+    def process(self, path):
+        """
+        Formats or checks a single file, returns False if it failed to parse
+        or, in check mode, isn't formatted
+        """
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError as e:
+            self.out.write(f"{path}: {e}\n")
+            return False
+
+        h = content_hash(data)
+        if self.hashes.get(path) == h:
+            return True
+
+        try:
+            # Files are rewritten unattended, so the output is always checked
+            # to parse to the same program before it replaces them
+            verify = self.verify or not self.check
+            formatted = format_text_parallel(decode(data), self.line_cache, verify,
+                                             self.data_values_per_line,
+                                             self.jobs).encode()
+        except Exception as e:
+            # Report any failure for this file and keep watching the others
+            self.out.write(f"{path}: {e}\n")
+            self.hashes[path] = h
+            return False
+
+        if formatted == data:
+            self.hashes[path] = h
+            return True
+
+        if self.check:
+            self.out.write(f"{path}: not formatted\n")
+            self.hashes[path] = h
+            return False
+
+        try:
+            with open(path, "wb") as f:
+                f.write(formatted)
+
+            # Remember our own output so writing it doesn't count as a change
+            self.hashes[path] = content_hash(formatted)
+            st = os.stat(path)
+            self.stats[path] = (st.st_mtime_ns, st.st_size)
+        except OSError as e:
+            self.out.write(f"{path}: {e}\n")
+            return False
+
+        self.out.write(f"{path}: formatted\n")
+        return True
+
+    def run(self):
+        # The first scan only records the current state of the tree
+        self.stats = self.scan()
+
+        while True:
+            for path in self.poll():
+                self.process(path)
+
+            self.out.flush()
+            time.sleep(self.interval)
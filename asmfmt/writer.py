@@ -1,17 +1,81 @@
 import sys
-from .items import CodeLine
+from itertools import zip_longest
+
+from .items import CodeLine, Instruction, DataLiterals, StructDefinition, StructInstantiation
+from .edits import TextEdit
+
+
+def wrap_data_lines(lines, n):
+    """
+    Splits data definitions made of a single run of literals into lines of
+    at most n values, the label and the comment stay on the first line.
+    Returns the new list of items, struct fields are wrapped too
+    """
+    wrapped = []
+
+    for l in lines:
+        if isinstance(l, StructDefinition):
+            wrapped.append(StructDefinition(l.name, wrap_data_lines(l.fields, n)))
+            continue
+
+        if not isinstance(l, CodeLine) or not l.instruction \
+           or l.instruction.prefix \
+           or len(l.instruction.operands) != 1 \
+           or not isinstance(l.instruction.operands[0], DataLiterals) \
+           or len(l.instruction.operands[0]) <= n:
+            wrapped.append(l)
+            continue
+
+        ins = l.instruction.instruction
+        literals = l.instruction.operands[0].values()
+        label = l.label
+        comment = l.comment
+
+        for i in range(0, len(literals), n):
+            data = DataLiterals(", ".join(literals[i:i + n]))
+            wrapped.append(CodeLine(label, Instruction(ins, [data], None), comment))
+            label = None
+            comment = None
+
+    return wrapped
 
 
 class Writer:
-    def __init__(self, lines):
+    def __init__(self, lines, data_values_per_line=None):
         self.lines = lines
         self.formatted_lines = []
         self.longest_line_length = 0
+        self.data_values_per_line = data_values_per_line
+
+    def expand_structs(self, lines):
+        """
+        Replaces structs with the items of their lines so every item is
+        formatted as exactly one line
+        """
+        expanded = []
+        for l in lines:
+            if isinstance(l, (StructDefinition, StructInstantiation)):
+                expanded.extend(self.expand_structs(l.lines()))
+            else:
+                expanded.append(l)
+
+        return expanded
 
     def format_lines(self):
+        if self.data_values_per_line:
+            self.lines = wrap_data_lines(self.lines, self.data_values_per_line)
+
+        self.lines = self.expand_structs(self.lines)
+
         self.formatted_lines = []
+
+        # Lines from the line cache share their item, only render it once
+        rendered = {}
         for l in self.lines:
-            f = l.format()
+            f = rendered.get(id(l))
+            if f is None:
+                f = l.format()
+                rendered[id(l)] = f
 
             if len(f) > self.longest_line_length:
                 self.longest_line_length = len(f)
@@ -33,6 +97,55 @@ class Writer:
 
             self.formatted_lines[i] += self.lines[i].comment.format()
 
+    def format(self):
+        """
+        Formats every line and returns the whole formatted text
+        """
+        self.format_lines()
+        self.add_comments()
+
+        return "".join(l + '\n' for l in self.formatted_lines)
+
+    def edits(self, source_lines) -> [TextEdit]:
+        """
+        Formats every line and compares it with the source line it was parsed
+        from, returns the edits that turn the source into the formatted text
+        with consecutive changed lines merged into one edit. source_lines can
+        be any iterable of lines, like the source file itself
+        """
+        if self.data_values_per_line:
+            raise ValueError("edits can't be computed when rewrapping data lines")
+
+        self.format_lines()
+        self.add_comments()
+
+        edits = []
+        edit = None
+        # A line ending in a lone \r is one line with the next for diff and
+        # patch, they only split at \n, so it stays in the same edit
+        line_ended = True
+        for i, (src, f) in enumerate(zip_longest(source_lines, self.formatted_lines)):
+            if f is not None:
+                f += '\n'
+
+            if src == f and line_ended:
+                edit = None
+                continue
+
+            line_ended = src is None or src.endswith('\n')
+
+            if edit is None:
+                edit = TextEdit(i, i, [], [])
+                edits.append(edit)
+
+            if src is not None:
+                edit.end += 1
+                edit.old_lines.append(src)
+            if f is not None:
+                edit.new_lines.append(f)
+
+        return edits
+
     def write_to_stdout(self):
         self.format_lines()
         self.add_comments()
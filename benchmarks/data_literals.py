@@ -0,0 +1,62 @@
+"""
+Measures parse time and live memory of a data table with the bulk scan of
+data literals and with every value parsed as an expression
+
+    python benchmarks/data_literals.py [lines] [values per line]
+"""
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from asmfmt.parser import Parser
+
+
+def make_text(count, values):
+    rnd = random.Random(0)
+    return "".join("    db " + ", ".join(f"0x{rnd.randrange(256):02x}" for _ in range(values))
+                   + "\n" for _ in range(count))
+
+
+def parse(text, bulk):
+    p = Parser(io.StringIO(text))
+    if not bulk:
+        p.tokenizer.scan_data_literals = lambda: None
+
+    return p.parse()
+
+
+def measure(text, bulk):
+    start = time.perf_counter()
+    parse(text, bulk)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    lines = parse(text, bulk)
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    del lines
+    return elapsed, current
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    values = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    text = make_text(count, values)
+
+    general_time, general_mem = measure(text, False)
+    bulk_time, bulk_mem = measure(text, True)
+
+    print(f"{count} lines of {values} values ({len(text) / 1e6:.1f}MB of source)")
+    print(f"  expressions: {general_time:.2f}s, {general_mem / 1e6:.1f}MB live")
+    print(f"  bulk scan:   {bulk_time:.2f}s, {bulk_mem / 1e6:.1f}MB live, "
+          f"{general_time / bulk_time:.1f}x faster, {general_mem / bulk_mem:.1f}x less memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Measures the live memory of a parsed file with and without the
+Tokenizer's identifier intern table
+
+    python benchmarks/intern_memory.py [lines]
+"""
+import io
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from asmfmt.parser import Parser
+
+
+REGISTERS = ["rax", "rbx", "rcx", "rdx", "rsi", "rdi", "r8", "r9"]
+MNEMONICS = ["mov", "add", "xor"]
+
+
+class NoInterning(dict):
+    """
+    An intern table that never keeps anything, every identifier gets its
+    own string and is classified again
+    """
+    def get(self, key, default=None):
+        return default
+
+    def __setitem__(self, key, value):
+        pass
+
+
+def make_text(count):
+    rnd = random.Random(0)
+    lines = []
+    for i in range(count):
+        label = f"l{i % 500}: " if i % 10 == 0 else "    "
+        lines.append(f"{label}{rnd.choice(MNEMONICS)} {rnd.choice(REGISTERS)}, "
+                     f"{rnd.choice(REGISTERS)}\n")
+
+    return "".join(lines)
+
+
+def live_memory(text, names):
+    tracemalloc.start()
+    lines = Parser(io.StringIO(text), names).parse()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    del lines
+    return current
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    text = make_text(count)
+
+    plain = live_memory(text, NoInterning())
+    interned = live_memory(text, None)
+
+    print(f"{count} lines: without interning {plain / 1e6:.1f}MB, "
+          f"interned {interned / 1e6:.1f}MB, {plain / interned:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
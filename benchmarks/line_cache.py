@@ -0,0 +1,51 @@
+"""
+Times formatting a source where most lines repeat, like unrolled code or
+macro heavy files, with and without a LineCache
+
+    python benchmarks/line_cache.py [lines] [distinct lines]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from asmfmt import format_text
+from asmfmt.cache import LineCache
+
+
+REGISTERS = ["eax", "ebx", "ecx", "edx", "esi", "edi"]
+
+
+def make_text(count, distinct):
+    rnd = random.Random(0)
+    pool = [f"    mov {rnd.choice(REGISTERS)}, dword [{rnd.choice(REGISTERS)} + {i}] ; step {i}\n"
+            for i in range(distinct)]
+
+    return "".join(rnd.choice(pool) for _ in range(count))
+
+
+def timed(f):
+    start = time.perf_counter()
+    f()
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    distinct = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    text = make_text(count, distinct)
+
+    uncached = timed(lambda: format_text(text))
+
+    cache = LineCache()
+    cached = timed(lambda: format_text(text, cache))
+
+    print(f"{count} lines, {distinct} distinct: without cache {uncached:.2f}s, "
+          f"with cache {cached:.2f}s, {uncached / cached:.1f}x "
+          f"({cache.hits} hits, {cache.misses} misses)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Times the parser on typical instruction lines with and without the
+Parser.parse_simple_line shortcut
+
+    python benchmarks/simple_lines.py [lines] [repeat]
+"""
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from asmfmt.parser import Parser
+
+
+REGISTERS = ["eax", "ebx", "ecx", "edx", "rax", "rbx", "rsi", "rdi"]
+MNEMONICS = ["mov", "add", "sub", "xor", "cmp", "and", "or", "lea"]
+
+
+def reg_imm_line(rnd):
+    src = rnd.choice([rnd.choice(REGISTERS), str(rnd.randint(0, 4096)), "0x10"])
+    return f"    {rnd.choice(MNEMONICS)} {rnd.choice(REGISTERS)}, {src}\n"
+
+
+def memory_line(rnd):
+    label = f"l{rnd.randint(0, 999)}: " if rnd.random() < 0.2 else "    "
+    comment = " ; load" if rnd.random() < 0.3 else ""
+    return f"{label}mov {rnd.choice(REGISTERS)}, [{rnd.choice(REGISTERS)} + {rnd.randint(0, 64)}]{comment}\n"
+
+
+def sized_memory_line(rnd):
+    # Size specifiers aren't a simple line, this shows the cost of the
+    # lines that fall back to the general parser
+    return f"    mov {rnd.choice(REGISTERS)}, dword [{rnd.choice(REGISTERS)} + {rnd.randint(0, 64)}]\n"
+
+
+CORPORA = {
+    "reg/imm": reg_imm_line,
+    "memory": memory_line,
+    "sized memory": sized_memory_line,
+}
+
+
+def parse(text, fast):
+    p = Parser(io.StringIO(text))
+    if not fast:
+        p.parse_simple_line = lambda text: None
+
+    start = time.perf_counter()
+    p.parse()
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    for name, make_line in CORPORA.items():
+        rnd = random.Random(0)
+        text = "".join(make_line(rnd) for _ in range(count))
+
+        general = min(parse(text, False) for _ in range(repeat))
+        fast = min(parse(text, True) for _ in range(repeat))
+
+        print(f"{name:12} {count} lines: general {general:.3f}s, "
+              f"simple lines {fast:.3f}s, {general / fast:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asmfmt import aio
+
+
+def run_results(paths, **kwargs):
+    """
+    Runs format_files on a thread pool so format_text can be monkeypatched
+    """
+    async def collect(executor):
+        return [r async for r in aio.format_files(paths, executor=executor, **kwargs)]
+
+    with ThreadPoolExecutor() as executor:
+        return asyncio.run(collect(executor))
+
+
+def test_errors_are_results(tmp_path, monkeypatch):
+    good = tmp_path / "good.asm"
+    good.write_text("mov eax, 1\n")
+    missing = tmp_path / "missing.asm"
+
+    def explode(text, line_cache, verify):
+        if "boom" in text:
+            raise RecursionError("maximum recursion depth exceeded")
+        return text
+
+    bad = tmp_path / "bad.asm"
+    bad.write_text("boom\n")
+    monkeypatch.setattr(aio, "format_text", explode)
+
+    results = {r.path: r for r in run_results([good, missing, bad])}
+
+    assert results[good].error is None
+    assert "No such file" in results[missing].error
+    assert results[bad].error.startswith("RecursionError")
+
+
+def test_timeout_is_reported(tmp_path, monkeypatch):
+    path = tmp_path / "slow.asm"
+    path.write_text("mov eax, 1\n")
+
+    def slow(text, line_cache, verify):
+        time.sleep(0.5)
+        return text
+
+    monkeypatch.setattr(aio, "format_text", slow)
+
+    [result] = run_results([path], timeout=0.05)
+
+    assert result.error == "timed out after 0.05s"
+
+
+def test_empty_error_is_shown():
+    assert str(aio.FormatResult("a.asm", error="")) == "FormatResult(a.asm, error=)"
+
+
+def test_default_process_pool(tmp_path):
+    good = tmp_path / "good.asm"
+    good.write_text("mov eax,1\n")
+    bad = tmp_path / "bad.asm"
+    bad.write_text("rep ; hi\n")
+
+    async def collect():
+        return [r async for r in aio.format_files([good, bad], write=True)]
+
+    try:
+        results = {r.path: r for r in asyncio.run(collect())}
+    finally:
+        aio.get_executor().shutdown()
+        aio._executor = None
+
+    assert results[good].error is None
+    assert results[good].changed
+    assert good.read_text() == "        mov     eax, 1\n"
+    assert results[bad].error.startswith("ERROR: Expected TokenType.INSTRUCTION")
+    assert bad.read_text() == "rep ; hi\n"
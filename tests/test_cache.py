@@ -0,0 +1,100 @@
+import io
+
+from asmfmt import format_text
+from asmfmt.cache import LineCache
+from asmfmt.items import StructDefinition, StructInstantiation
+from asmfmt.parser import Parser
+
+
+SOURCE = """SECTION .text
+struc point
+.x: resd 1 ; the x
+.y: resd 1
+endstruc
+istruc point
+at .x, dd 1
+at .y, dd 2
+iend
+start: mov eax, [rbx + 8] ; load
+    mov eax, [rbx + 8] ; load
+    db 1, 2, 3
+    db 1, 2, 3
+    %define X 1 + 2
+    mov eax, -(1 + 2) / 3
+    mov eax, -(1 + 2) / 3
+"""
+
+
+def test_lru_eviction():
+    cache = LineCache(max_size=2)
+    cache.put("a\n", "A")
+    cache.put("b\n", "B")
+
+    # a is now the most recently used
+    assert cache.get("a\n") == "A"
+    cache.put("c\n", "C")
+
+    assert len(cache) == 2
+    assert cache.get("b\n") is None
+    assert cache.get("a\n") == "A"
+    assert cache.get("c\n") == "C"
+
+
+def test_counters():
+    cache = LineCache()
+    cache.get("a\n")
+    cache.put("a\n", "A")
+    cache.get("a\n")
+    cache.get("a\n")
+
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_repeated_lines_are_hits():
+    cache = LineCache()
+    format_text("mov eax, 1\n" * 10, cache)
+
+    assert cache.hits == 9
+    assert len(cache) == 1
+
+
+def test_cached_output_matches_uncached():
+    cache = LineCache()
+    expected = format_text(SOURCE)
+
+    assert format_text(SOURCE, cache) == expected
+
+    # The second time only the struc and istruc lines miss, they start
+    # blocks that aren't cached
+    hits, misses = cache.hits, cache.misses
+    assert format_text(SOURCE, cache) == expected
+    assert (cache.hits - hits, cache.misses - misses) == (8, 2)
+    assert format_text(SOURCE * 3, cache) == format_text(SOURCE * 3)
+
+
+def test_small_cache_matches_uncached():
+    cache = LineCache(max_size=1)
+
+    assert format_text(SOURCE * 2, cache) == format_text(SOURCE * 2)
+
+
+def test_structs_are_not_cached():
+    cache = LineCache()
+    lines = Parser(io.StringIO(SOURCE), line_cache=cache).parse()
+
+    for text in ["struc point\n", ".x: resd 1 ; the x\n", ".y: resd 1\n",
+                 "istruc point\n", "at .x, dd 1\n", "iend\n"]:
+        assert text not in cache.entries
+
+    assert not any(isinstance(item, (StructDefinition, StructInstantiation))
+                   for item in cache.entries.values())
+    assert sum(isinstance(l, StructDefinition) for l in lines) == 1
+
+
+def test_field_line_outside_struct():
+    # The same text as a struct field, parsed on its own line
+    cache = LineCache()
+    text = SOURCE + ".y: resd 1\n"
+
+    assert format_text(text, cache) == format_text(text)
+    assert ".y: resd 1\n" in cache.entries
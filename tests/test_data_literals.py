@@ -0,0 +1,97 @@
+"""
+Runs of data literals are scanned in bulk into DataLiterals, they have to
+format and fail the same as when every value goes through parse_expression
+"""
+import io
+import random
+
+import pytest
+
+from asmfmt import format_text
+from asmfmt.items import DataLiterals
+from asmfmt.parser import Parser
+from asmfmt.writer import Writer
+
+
+DEFINITIONS = ["db", "dw", "dd", "dq"]
+
+NUMBERS = ["1", "0x10", "12h", "$0c8", "0b101", "1_000", "7q", "0d9"]
+
+# Mostly numbers, sometimes something that ends the bulk scan
+OTHER_VALUES = ["a", "1 + 2", "-1", "(3)", '"s"', "'c'", "", "1 2"]
+
+SPACES = ["", " ", "  ", "\t", "\r"]
+
+
+LINES = [
+    "db 1, 2, 3\n",
+    "x: db 1,2 ,\t3 , 0x10 ; table\n",
+    "dw 0x10,12h,$0c8,0b101,1_000,7q\n",
+    "db 5\n",
+    "db 1, 2 + 3, 4\n",
+    "db 1, 2,\n",
+    "db 1, \"s\", 2\n",
+    "dd 1, 2 ; no newline",
+    "times 4 db 1, 2\n",
+]
+
+
+def format_outcome(text, bulk, data_values_per_line=None):
+    p = Parser(io.StringIO(text))
+    if not bulk:
+        p.tokenizer.scan_data_literals = lambda: None
+
+    lines = p.parse()
+    if lines and isinstance(lines[-1], str):
+        return lines[-1].splitlines()[0]
+
+    return Writer(lines, data_values_per_line).format()
+
+
+def random_lines(count, seed=3):
+    rnd = random.Random(seed)
+    for _ in range(count):
+        values = []
+        for _ in range(rnd.randint(1, 16)):
+            if rnd.random() < 0.05:
+                values.append(rnd.choice(OTHER_VALUES))
+            else:
+                values.append(rnd.choice(NUMBERS))
+
+        line = rnd.choice(["", "x: ", "x "]) + rnd.choice(DEFINITIONS) + " "
+        for i, value in enumerate(values):
+            if i:
+                line += rnd.choice(SPACES) + "," + rnd.choice(SPACES)
+            line += value
+
+        yield line + rnd.choice(SPACES) + rnd.choice(["", ",", " ; c"]) + "\n"
+
+
+@pytest.mark.parametrize("text", LINES)
+def test_lines(text):
+    assert format_outcome(text, True) == format_outcome(text, False)
+
+
+def test_random_lines():
+    for text in random_lines(2000):
+        assert format_outcome(text, True) == format_outcome(text, False), repr(text)
+
+
+def test_bulk_scan_is_used():
+    [line] = Parser(io.StringIO("db 1 ,2,\t3\n")).parse()
+    [operand] = line.instruction.operands
+
+    assert isinstance(operand, DataLiterals)
+    assert operand.text == "1 ,2,\t3"
+    assert operand.values() == ["1", "2", "3"]
+    assert len(operand) == 3
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 16])
+def test_wrap(n):
+    text = "x: db 1, 2, 3, 4, 5 ; c\nstruc s\n.a: dw 1,2,3\nendstruc\n"
+    formatted = format_text(text, verify=True, data_values_per_line=n)
+
+    assert format_text(formatted, data_values_per_line=n) == formatted
+    assert formatted.count("db") == -(-5 // n)
+    assert formatted.count("dw") == -(-3 // n)
@@ -0,0 +1,79 @@
+import io
+import shutil
+import subprocess
+
+import pytest
+
+from asmfmt import file_edits, format_text
+from asmfmt.edits import unified_diff
+
+
+FORMATTED = "        mov     eax, 1  ; one\n        mov     ebx, 2\n"
+
+SOURCES = [
+    "mov eax,1 ; one\nmov ebx,2\n",
+    "mov eax,1 ; one\r\nmov ebx,2\r\n",
+    "mov eax,1 ; one\rmov ebx,2\r",
+    "mov eax,1 ; one\nmov ebx,2",
+    "mov eax,1 ; one\r\nmov ebx,2",
+    "mov eax,1 ; one\rmov ebx,2",
+    "mov eax,1 ; one\r\nmov ebx,2\rnop\nnop\r",
+    FORMATTED.replace("\n", "\r", 1),
+    FORMATTED.replace("\n", "\r\n", 1),
+    FORMATTED[:-1],
+    FORMATTED + "\n\n",
+    FORMATTED + "nop",
+    "nop\n" + FORMATTED + "nop\r\n" + FORMATTED + "nop\r",
+    FORMATTED,
+]
+
+
+def write(tmp_path, source):
+    path = tmp_path / "a.asm"
+    path.write_bytes(source.encode())
+    return path
+
+
+def expected(source):
+    # What format_text gives for the file read with universal newlines
+    return format_text(io.StringIO(source, newline=None).read())
+
+
+def apply_edits(source, edits):
+    lines = io.StringIO(source, newline='').readlines()
+    for e in reversed(edits):
+        assert lines[e.start:e.end] == e.old_lines
+        lines[e.start:e.end] = e.new_lines
+
+    return "".join(lines)
+
+
+@pytest.mark.parametrize("source", SOURCES)
+def test_apply_edits(tmp_path, source):
+    edits = file_edits(str(write(tmp_path, source)))
+
+    assert apply_edits(source, edits) == expected(source)
+
+
+def test_formatted_file_has_no_edits(tmp_path):
+    assert file_edits(str(write(tmp_path, FORMATTED))) == []
+    assert unified_diff([], "a.asm") == ""
+
+
+@pytest.mark.skipif(shutil.which("patch") is None, reason="needs patch")
+@pytest.mark.parametrize("source", SOURCES)
+def test_apply_diff(tmp_path, source):
+    path = write(tmp_path, source)
+    diff = unified_diff(file_edits(str(path)), "a.asm")
+
+    # The marker only ever ends the diff, after the last line of the file
+    assert diff.count("\\ No newline at end of file") <= 1
+    if "\\ No newline" in diff:
+        assert diff.endswith("\\ No newline at end of file\n") \
+            or "\\ No newline at end of file\n+" in diff
+
+    result = subprocess.run(["patch", "-p1", "--quiet", "--binary"], cwd=tmp_path,
+                            input=diff.encode(), capture_output=True)
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert path.read_bytes().decode() == expected(source)
@@ -0,0 +1,79 @@
+import pytest
+
+from asmfmt import format_text, items, parallel, FormatErrorException, VerificationErrorException
+from asmfmt.parallel import split_chunks, format_text_parallel
+
+
+# Characters str.splitlines treats as line breaks but the parser doesn't
+LINE_BREAKS = ["\r", "\x0b", "\x0c", "\x1c", "\x1d", "\x1e", "\x85", "\u2028"]
+
+
+def outcome(fmt, text, **kwargs):
+    try:
+        return fmt(text, **kwargs)
+    except FormatErrorException as e:
+        return FormatErrorException, str(e)
+
+
+@pytest.mark.parametrize("brk", LINE_BREAKS)
+def test_split_chunks_only_at_newline(brk):
+    text = f"mov eax, 1 ; page{brk}break\n" * 4
+    chunks = split_chunks(text, 1)
+
+    assert chunks == [f"mov eax, 1 ; page{brk}break\n"] * 4
+    assert "".join(chunks) == text
+
+
+@pytest.mark.parametrize("brk", LINE_BREAKS)
+@pytest.mark.parametrize("text", [
+    "mov eax, 1 ; page{brk}break\n",
+    "start:  mov eax, 1{brk}\n",
+    "db 1, 2{brk}, 3\n",
+    "{brk}\n",
+])
+def test_parallel_matches_serial(brk, text):
+    text = text.format(brk=brk) * 4
+
+    assert outcome(format_text_parallel, text, jobs=2, chunk_lines=1) \
+        == outcome(format_text, text)
+
+
+def test_parallel_keeps_structs_whole():
+    text = "struc point\n.x: resd 1 ; the x\n.y: resd 1\nendstruc\n" \
+        "istruc point\nat .x, dd 1\nat .y, dd 2\niend\n" \
+        "mov eax, [rbx + 8] ; load\n"
+    chunks = split_chunks(text, 1)
+
+    assert chunks[0].startswith("struc") and chunks[0].endswith("endstruc\n")
+    assert chunks[1].startswith("istruc") and chunks[1].endswith("iend\n")
+    assert format_text_parallel(text, jobs=2, chunk_lines=1) == format_text(text)
+
+
+def test_large_text_is_split_per_job(monkeypatch):
+    monkeypatch.setattr(parallel, "PARALLEL_MIN_LINES", 10)
+    calls = []
+    monkeypatch.setattr(parallel, "split_chunks",
+                        lambda text, n: calls.append(n) or split_chunks(text, n))
+    text = "mov eax, 1 ; one\nadd ebx, 22\n" * 10
+
+    assert format_text_parallel(text, jobs=2) == format_text(text)
+    assert calls == [11]
+
+    # Small texts and a single job stay serial
+    assert format_text_parallel(text[:40], jobs=2) == format_text(text[:40])
+    assert format_text_parallel(text, jobs=1) == format_text(text)
+    assert calls == [11]
+
+
+def test_parallel_verify(monkeypatch):
+    text = "mov eax, 1\nrep movsb ; x y\n" * 4
+
+    assert format_text_parallel(text, verify=True, jobs=2, chunk_lines=2) \
+        == format_text(text)
+
+    # The workers are forked with the broken Writer too
+    monkeypatch.setattr(items.Comment, "format", lambda self: self.comment)
+    with pytest.raises(VerificationErrorException) as e:
+        format_text_parallel(text, verify=True, jobs=2, chunk_lines=2)
+
+    assert e.value.line == 2
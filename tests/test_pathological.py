@@ -0,0 +1,75 @@
+"""
+Inputs that used to be slow, recurse without bound or read past the end of
+the file. Each is run at a few sizes and has to stay within a time and
+memory budget that grows linearly with the input
+"""
+import time
+import tracemalloc
+
+import pytest
+
+from asmfmt import format_text, FormatErrorException
+
+
+SIZES = [1_000, 10_000, 100_000]
+
+# Budget per input character, plus a fixed amount for small inputs
+SECONDS_PER_CHAR = 50e-6
+SECONDS_BASE = 0.5
+BYTES_PER_CHAR = 300
+BYTES_BASE = 2_000_000
+
+CASES = {
+    "unterminated string": lambda n: 'db "' + "a" * n,
+    "unterminated string line": lambda n: 'db "' + "a" * n + "\nmov eax, 1\n",
+    "unterminated char": lambda n: "mov al, '" + "a" * n,
+    "unterminated struc": lambda n: "struc foo\n" + ".a: resb 1\n" * (n // 11),
+    "nested struc": lambda n: "struc a\n" * (n // 8),
+    "istruc in struc": lambda n: ("struc a\n" + "istruc b\n" * (n // 9)),
+    "unterminated istruc": lambda n: "istruc foo\n" + "at .a, db 1\n" * (n // 12),
+    "comment without newline": lambda n: "mov eax, 1 ; " + "c" * n,
+    "warning without newline": lambda n: "%warning " + "w" * n,
+    "empty warnings": lambda n: "%warning\nmov eax, 1\n" * (n // 20),
+    "long ident": lambda n: "a" * n + ":\n",
+    "long operand": lambda n: "mov eax, " + "x" * n + "\n",
+    "long data": lambda n: "db " + ", ".join(["0x12"] * (n // 6)) + "\n",
+    "operator chain": lambda n: "mov eax, " + " + ".join(["1"] * (n // 4)) + "\n",
+    "chain of parens": lambda n: "mov eax, " + " - ".join(["(1 + a)"] * (n // 10)) + "\n",
+    "nested parens": lambda n: "mov eax, " + "(" * n + "1" + ")" * n + "\n",
+    "nested unary": lambda n: "mov eax, " + "-" * n + "1\n",
+    "nested address": lambda n: "mov eax, [" + "(" * n + "1" + ")" * n + "]\n",
+}
+
+
+def run(text):
+    try:
+        format_text(text)
+    except FormatErrorException:
+        pass
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("name", CASES)
+def test_time(name, size):
+    text = CASES[name](size)
+
+    start = time.perf_counter()
+    run(text)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < SECONDS_BASE + SECONDS_PER_CHAR * len(text)
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("name", CASES)
+def test_memory(name, size):
+    text = CASES[name](size)
+
+    tracemalloc.start()
+    try:
+        run(text)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert peak < BYTES_BASE + BYTES_PER_CHAR * len(text)
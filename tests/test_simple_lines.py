@@ -0,0 +1,70 @@
+"""
+Parser.parse_simple_line is a shortcut for common instruction lines, it has
+to give the same items, errors and output as the general parser
+"""
+import io
+import random
+
+import pytest
+
+from asmfmt.parser import Parser
+from asmfmt.writer import Writer
+
+
+PIECES = [
+    "mov", "add", "rax", "eax", "rbx", "byte", "dword", "[", "]", "+", "-",
+    "1", "0x10", "12h", "$0c8", ",", " ", " ", " ", "\t", ":", ";", " c",
+    "lbl", "db", "rep", "\r", "x.y", "_a", "0b", "0d", "foo", "(", ")",
+    "struc", "%", "call", "é", "\x0c", "'", '"',
+]
+
+LINES = [
+    "mov eax, 1\n",
+    "  add rax, rbx ; comment\n",
+    "start: mov eax, 0x10\n",
+    "push rbp",
+    "ret\n",
+    "mov eax, 1,\n",
+    "mov eax,\n",
+    "mov al, byte [rbx + 8]\n",
+    "rep movsb\n",
+    "db 1, 2, 3\n",
+    "mov eax, 12h ; x\r\n",
+]
+
+
+def parse(text, fast):
+    p = Parser(io.StringIO(text))
+    if not fast:
+        p.parse_simple_line = lambda text: None
+
+    lines = p.parse()
+    dump = [str(l) for l in lines]
+
+    if lines and isinstance(lines[-1], str):
+        return dump, None
+
+    return dump, Writer(lines).format()
+
+
+def random_lines(count, seed=1):
+    rnd = random.Random(seed)
+    for _ in range(count):
+        yield "".join(rnd.choice(PIECES) for _ in range(rnd.randint(1, 8))) + "\n"
+
+
+@pytest.mark.parametrize("text", LINES)
+def test_simple_lines(text):
+    assert parse(text, True) == parse(text, False)
+
+
+def test_random_lines():
+    for text in random_lines(5000):
+        assert parse(text, True) == parse(text, False), repr(text)
+
+
+def test_random_files():
+    lines = list(random_lines(2000, seed=2))
+    for i in range(0, len(lines), 20):
+        text = "".join(lines[i:i + 20])
+        assert parse(text, True) == parse(text, False), repr(text)
@@ -0,0 +1,32 @@
+import io
+
+import pytest
+
+from asmfmt import format_text
+from asmfmt.token import Tokenizer, keyword_names
+
+
+def test_seeded_names_agree_with_classify_ident():
+    tokenizer = Tokenizer(io.StringIO(""))
+
+    for name, (interned, _type) in keyword_names().items():
+        assert interned == name
+        assert tokenizer.classify_ident(name) == _type, name
+        assert tokenizer.classify_ident(name.upper()) == _type, name
+        assert tokenizer.classify_ident(name.lower()) == _type, name
+
+
+@pytest.mark.parametrize("mnemonic", ["vextractf32x8", "VEXTRACTF32X8", "VEXTRACTF32x8"])
+def test_mixed_case_instruction(mnemonic):
+    assert format_text(f"{mnemonic} ymm0, zmm1, 1\n").split() \
+        == [mnemonic, "ymm0,", "zmm1,", "1"]
+
+
+def test_unseeded_names_are_interned():
+    tokenizer = Tokenizer(io.StringIO(""))
+
+    a = tokenizer.lookup_ident("".join(["my", "_label"]))
+    b = tokenizer.lookup_ident("".join(["my_", "label"]))
+
+    assert a[0] is b[0]
+    assert a[1] == tokenizer.classify_ident("my_label")
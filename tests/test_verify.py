@@ -0,0 +1,109 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from asmfmt import format_text, items, VerificationErrorException
+from asmfmt.fingerprint import fingerprint_text, first_difference
+
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+SOURCE = """SECTION .text
+%define X 1 + 2
+struc point
+.x: resd 1 ; the x
+.y: resd 1
+endstruc
+istruc point
+at .x, dd 1
+at .y, dd 2
+iend
+start: mov eax, [rbx + 8] ; load
+    mov al, 'a'
+msg: db "hi", 0, 10
+    mov eax, -(1 + 2) / 3
+    times 4 db 0
+    lock rep movsb
+"""
+
+
+def test_verify_passes():
+    formatted = format_text(SOURCE, verify=True)
+
+    assert formatted == format_text(SOURCE)
+    assert format_text(formatted, verify=True) == formatted
+
+
+def test_whitespace_and_comment_column_dont_matter():
+    a = fingerprint_text("start: mov eax,1 ; one\n")
+    b = fingerprint_text("start:\tmov     eax, 1          ; one\n")
+
+    assert first_difference(a, b) is None
+
+
+@pytest.mark.parametrize("other", [
+    "start: mov eax, 2 ; one\n",
+    "start: mov eax, 1 ; two\n",
+    "begin: mov eax, 1 ; one\n",
+    "start: mov eax, 1\n",
+    "start: mov eax, 1 ; one\nnop\n",
+])
+def test_different_programs(other):
+    a = fingerprint_text("start: mov eax, 1 ; one\n")
+
+    assert first_difference(a, fingerprint_text(other)) == 1 + other.count("\n") // 2
+
+
+def test_mismatch_is_reported(monkeypatch):
+    # A Writer that forgets the `;` turns the comment into operands
+    monkeypatch.setattr(items.Comment, "format", lambda self: self.comment)
+
+    with pytest.raises(VerificationErrorException) as e:
+        format_text("mov eax, 1\nrep movsb ; x y\n", verify=True)
+
+    assert e.value.line == 2
+
+
+def test_mismatch_in_struct(monkeypatch):
+    # The first data literals are in the istruc, lines in structs still have
+    # their own number
+    monkeypatch.setattr(items.DataLiterals, "format", lambda self: "0")
+
+    with pytest.raises(VerificationErrorException) as e:
+        format_text(SOURCE, verify=True)
+
+    assert e.value.line == 8
+
+
+def run_cli(*args):
+    return subprocess.run([sys.executable, "asmfmt.py", *args], cwd=ROOT,
+                          capture_output=True, text=True)
+
+
+def test_cli_verify_is_check_only(tmp_path):
+    path = tmp_path / "a.asm"
+    path.write_text(SOURCE)
+
+    result = run_cli("--verify", str(path))
+    assert result.returncode == 0
+    assert result.stdout == ""
+
+    path.write_text("rep ; hi\n")
+    result = run_cli("--verify", str(path))
+    assert result.returncode == 1
+    assert result.stderr.startswith(f"{path}: ")
+
+
+@pytest.mark.parametrize("args", [
+    ["--check"],
+    ["--edits", "--diff"],
+    ["--verify", "--edits"],
+    ["--verify", "--diff"],
+])
+def test_cli_rejects_flag_combinations(tmp_path, args):
+    path = tmp_path / "a.asm"
+    path.write_text(SOURCE)
+
+    assert run_cli(str(path), *args).returncode == 2
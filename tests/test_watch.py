@@ -0,0 +1,152 @@
+import io
+import os
+
+import pytest
+
+from asmfmt import watch
+from asmfmt.watch import Watcher
+
+
+UNFORMATTED = "mov eax,1 ; one\nmov ebx,2\n"
+FORMATTED = "        mov     eax, 1  ; one\n        mov     ebx, 2\n"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(watch.time, "monotonic", clock)
+    return clock
+
+
+def make_watcher(tmp_path, **kwargs):
+    w = Watcher([str(tmp_path)], out=io.StringIO(), **kwargs)
+    w.stats = w.scan()
+    return w
+
+
+def test_formats_changed_file(tmp_path, clock):
+    w = make_watcher(tmp_path, debounce=0)
+    path = tmp_path / "a.asm"
+    path.write_text(UNFORMATTED)
+
+    assert w.poll() == [str(path)]
+    assert w.process(str(path))
+    assert path.read_text() == FORMATTED
+    assert w.out.getvalue() == f"{path}: formatted\n"
+
+
+def test_own_write_is_not_a_change(tmp_path, clock):
+    w = make_watcher(tmp_path, debounce=0)
+    path = tmp_path / "a.asm"
+    path.write_text(UNFORMATTED)
+
+    for p in w.poll():
+        w.process(p)
+
+    clock.now += 1
+    assert w.poll() == []
+
+
+def test_unchanged_content_is_skipped(tmp_path, clock):
+    path = tmp_path / "a.asm"
+    path.write_text(FORMATTED)
+    w = make_watcher(tmp_path, debounce=0)
+
+    assert w.process(str(path))
+    # Touching the file only changes its mtime, the hash is the same
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert w.poll() == [str(path)]
+    assert w.process(str(path))
+    assert w.out.getvalue() == ""
+
+
+def test_debounce(tmp_path, clock):
+    w = make_watcher(tmp_path, debounce=1)
+    path = tmp_path / "a.asm"
+    path.write_text(UNFORMATTED)
+
+    assert w.poll() == []
+
+    clock.now += 0.5
+    path.write_text(UNFORMATTED + "nop\n")
+    assert w.poll() == []
+
+    # Still changing, the settle time starts over
+    clock.now += 0.9
+    assert w.poll() == []
+
+    clock.now += 1
+    assert w.poll() == [str(path)]
+
+
+def test_check_does_not_write(tmp_path, clock):
+    w = make_watcher(tmp_path, check=True, debounce=0)
+    path = tmp_path / "a.asm"
+    path.write_text(UNFORMATTED)
+
+    assert w.poll() == [str(path)]
+    assert not w.process(str(path))
+    assert path.read_text() == UNFORMATTED
+    assert w.out.getvalue() == f"{path}: not formatted\n"
+
+    # Reported once until the file changes again
+    w.process(str(path))
+    assert w.out.getvalue().count("not formatted") == 1
+
+
+def test_deleted_file(tmp_path, clock):
+    w = make_watcher(tmp_path, debounce=1)
+    path = tmp_path / "a.asm"
+    path.write_text(UNFORMATTED)
+
+    assert w.poll() == []
+    path.unlink()
+
+    clock.now += 2
+    assert w.poll() == []
+    assert str(path) not in w.pending
+
+
+def test_parse_error_is_reported(tmp_path, clock):
+    w = make_watcher(tmp_path, debounce=0)
+    path = tmp_path / "a.asm"
+    path.write_text("rep ; hi\n")
+    other = tmp_path / "b.asm"
+    other.write_text(UNFORMATTED)
+
+    results = {p: w.process(p) for p in w.poll()}
+
+    assert results == {str(path): False, str(other): True}
+    assert path.read_text() == "rep ; hi\n"
+    assert other.read_text() == FORMATTED
+
+
+def test_crlf_file(tmp_path, clock):
+    w = make_watcher(tmp_path, debounce=0)
+    path = tmp_path / "a.asm"
+    path.write_bytes(UNFORMATTED.replace("\n", "\r\n").encode())
+
+    for p in w.poll():
+        w.process(p)
+
+    assert path.read_bytes() == FORMATTED.encode()
+
+
+def test_ignores_hidden_dirs_and_other_files(tmp_path, clock):
+    w = make_watcher(tmp_path, debounce=0)
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "a.asm").write_text(UNFORMATTED)
+    (tmp_path / "notes.txt").write_text(UNFORMATTED)
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.inc").write_text(UNFORMATTED)
+
+    assert w.poll() == [str(tmp_path / "sub" / "b.inc")]